@@ -1,7 +1,9 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+import plotly.io as pio
+
+import dashboard_core as core
 
 # =====================================================
 # PAGE CONFIG
@@ -45,12 +47,6 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# Theme colors
-BG = "#080C14"          # background
-ACCENT = "#4e9eff"      # electric blue
-MAGENTA = "#ff4e88"     # pink accent
-PANEL = "#121B2D"       # card color
-
 # =====================================================
 # TITLE
 # =====================================================
@@ -72,53 +68,11 @@ if uploaded is None:
     st.info("Upload the Excel dataset to generate the dashboard.")
     st.stop()
 
-df = pd.read_excel(uploaded)
-df.columns = df.columns.str.strip()
-
-# convert numeric cols
-for col in df.columns:
-    df[col] = pd.to_numeric(df[col], errors="ignore")
-
-# =====================================================
-# CLASSIFICATION LOGIC
-# =====================================================
-def classify_mass(v):
-    try:
-        q1, q2 = df["BlackHole_Mass_SolarMass"].quantile([0.33, 0.66])
-        if v < q1:
-            return "Low Mass"
-        elif v < q2:
-            return "Medium Mass"
-        else:
-            return "High Mass"
-    except Exception:
-        return "Unknown"
-
-def classify_spin(v):
-    try:
-        if v < 0.33:
-            return "Low Spin"
-        elif v < 0.66:
-            return "Medium Spin"
-        else:
-            return "High Spin"
-    except Exception:
-        return "Unknown"
-
-def classify_edd(e):
-    try:
-        if e < 0.1:
-            return "Sub-Eddington"
-        elif e <= 1.0:
-            return "Near-Eddington"
-        else:
-            return "Super-Eddington"
-    except Exception:
-        return "Unknown"
+df = core.load_data(uploaded.getvalue())
 
-df["Mass_Class"] = df["BlackHole_Mass_SolarMass"].apply(classify_mass)
-df["Spin_Class"] = df["Spin_Factor"].apply(classify_spin)
-df["Eddington_Class"] = df["Eddington_Ratio"].apply(classify_edd)
+# stable per uploaded file, unlike id(df): st.cache_data returns a fresh
+# unpickled copy on every call
+upload_token = uploaded.file_id
 
 # =====================================================
 # SIDEBAR FILTERS
@@ -141,11 +95,19 @@ edd_f = st.sidebar.multiselect(
     sorted(df["Eddington_Class"].unique())
 )
 
-filtered = df[
-    df["Mass_Class"].isin(mass_f) &
-    df["Spin_Class"].isin(spin_f) &
-    df["Eddington_Class"].isin(edd_f)
-]
+filter_key = (tuple(sorted(mass_f)), tuple(sorted(spin_f)), tuple(sorted(edd_f)))
+
+# unrelated widget reruns (e.g. toggling the table expander) keep the same
+# key, so the filter pass is skipped entirely on no-op reruns; the upload
+# token ties the gate to the file, since a new workbook usually produces
+# the same class labels and hence an identical filter tuple
+state_key = (upload_token, filter_key)
+if st.session_state.get("_filter_key") != state_key:
+    st.session_state["_filtered"] = core.apply_filters(df, filter_key, upload_token)
+    st.session_state["_filter_key"] = state_key
+filtered = st.session_state["_filtered"]
+
+kpi = core.compute_kpis(filtered, filter_key, upload_token)
 
 # =====================================================
 # KPI BLOCKS (NEW DESIGN)
@@ -155,69 +117,62 @@ k1, k2, k3, k4 = st.columns(4)
 with k1:
     st.markdown(
         "<div class='kpi'>Total Objects<br><div class='metric-value'>"
-        + str(len(filtered)) + "</div></div>",
+        + str(kpi["count"]) + "</div></div>",
         unsafe_allow_html=True
     )
 
 with k2:
     st.markdown(
         "<div class='kpi'>Mean Mass (M☉)<br><div class='metric-value'>"
-        + f"{filtered['BlackHole_Mass_SolarMass'].mean():.2f}" + "</div></div>",
+        + f"{kpi['mean_mass']:.2f}" + "</div></div>",
         unsafe_allow_html=True
     )
 
 with k3:
     st.markdown(
         "<div class='kpi'>Mean Spin<br><div class='metric-value'>"
-        + f"{filtered['Spin_Factor'].mean():.3f}" + "</div></div>",
+        + f"{kpi['mean_spin']:.3f}" + "</div></div>",
         unsafe_allow_html=True
     )
 
 with k4:
     st.markdown(
         "<div class='kpi'>Mean X-ray Luminosity<br><div class='metric-value'>"
-        + f"{filtered['Xray_Luminosity_erg_s'].mean():.2e}" + "</div></div>",
+        + f"{kpi['mean_lum']:.2e}" + "</div></div>",
         unsafe_allow_html=True
     )
 
 st.markdown("")
 
+# =====================================================
+# CHART BUILDS (PARALLEL)
+# =====================================================
+# the builders only touch pandas/plotly, never Streamlit widget state,
+# so they can run concurrently; NumPy reductions and orjson encoding
+# release the GIL
+jet_90 = core.global_stats(df, upload_token)["jet_90"]
+builders = {
+    "pie": lambda: core.make_fig_pie(filtered, filter_key, upload_token),
+    "spin_bar": lambda: core.make_fig_spin_bar(filtered, filter_key, upload_token),
+    "scatter": lambda: core.make_fig_scatter(filtered, filter_key, upload_token),
+    "line": lambda: core.make_fig_line(filtered, filter_key, upload_token),
+    "radar": lambda: core.make_fig_radar(filtered, filter_key, upload_token),
+    "gauge": lambda: core.make_fig_gauge(filtered, filter_key, upload_token, jet_90)
+}
+with ThreadPoolExecutor(max_workers=6) as ex:
+    futs = {name: ex.submit(fn) for name, fn in builders.items()}
+figs = {name: pio.from_json(fut.result()) for name, fut in futs.items()}
+
 # =====================================================
 # ROW 1 — DONUT + BAR
 # =====================================================
 r1c1, r1c2 = st.columns(2)
 
 with r1c1:
-    fig = px.pie(
-        filtered,
-        names="Mass_Class",
-        hole=0.55,
-        color_discrete_sequence=[ACCENT, MAGENTA, "#82eefd"]
-    )
-    fig.update_layout(
-        template="plotly_dark",
-        title="Mass Class Breakdown",
-        paper_bgcolor=BG
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(figs["pie"], use_container_width=True)
 
 with r1c2:
-    spin_count = filtered["Spin_Class"].value_counts().reset_index()
-    spin_count.columns = ["Spin_Class", "count"]
-
-    fig = px.bar(
-        spin_count,
-        x="Spin_Class",
-        y="count",
-        color="count",
-        color_continuous_scale="Viridis"
-    )
-    fig.update_layout(
-        template="plotly_dark",
-        title="Spin Class Distribution",
-        paper_bgcolor=BG
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(figs["spin_bar"], use_container_width=True)
 
 # =====================================================
 # ROW 2 — SCATTER + TEMPERATURE LINE
@@ -225,34 +180,10 @@ with r1c2:
 r2c1, r2c2 = st.columns(2)
 
 with r2c1:
-    fig = px.scatter(
-        filtered,
-        x="BlackHole_Mass_SolarMass",
-        y="Xray_Luminosity_erg_s",
-        color="Eddington_Class",
-        hover_data=["BlackHole_ID"],
-        color_discrete_sequence=[ACCENT, MAGENTA, "#ffa94e"]
-    )
-    fig.update_layout(
-        template="plotly_dark",
-        title="Mass vs X-ray Luminosity",
-        paper_bgcolor=BG
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(figs["scatter"], use_container_width=True)
 
 with r2c2:
-    fig = px.line(
-        filtered.sort_values("BlackHole_Mass_SolarMass"),
-        x="BlackHole_Mass_SolarMass",
-        y="Disk_Temperature_Inner_K",
-        color_discrete_sequence=[ACCENT],
-        template="plotly_dark"
-    )
-    fig.update_layout(
-        title="Inner Disk Temperature Trend",
-        paper_bgcolor=BG
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(figs["line"], use_container_width=True)
 
 # =====================================================
 # ROW 3 — RADAR + GAUGE
@@ -260,50 +191,10 @@ with r2c2:
 r3c1, r3c2 = st.columns(2)
 
 with r3c1:
-    radar_cols = [
-        "Magnetic_Flux_Gauss", "Gravitational_Redshift",
-        "Radiation_Pressure", "Relativistic_Beaming_Factor",
-        "Hardness_Ratio", "Eddington_Ratio"
-    ]
-    radar_vals = [filtered[c].mean() if c in filtered else 0 for c in radar_cols]
-
-    fig = go.Figure()
-    fig.add_trace(go.Scatterpolar(
-        r=radar_vals,
-        theta=radar_cols,
-        fill='toself',
-        line_color=ACCENT
-    ))
-    fig.update_layout(
-        title="Accretion Physics Radar Model",
-        template="plotly_dark",
-        paper_bgcolor=BG
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(figs["radar"], use_container_width=True)
 
 with r3c2:
-    # Jet power gauge
-    if "Jet_Energy_erg" in filtered and not filtered["Jet_Energy_erg"].isna().all():
-        jet_mean = filtered["Jet_Energy_erg"].mean()
-        jet_90 = df["Jet_Energy_erg"].quantile(0.90)
-        score = min(100, (jet_mean / jet_90) * 100) if jet_90 else 0
-    else:
-        score = 0
-
-    fig = go.Figure(go.Indicator(
-        mode="gauge+number",
-        value=score,
-        title={"text": "Jet Power Index"},
-        gauge={
-            "axis": {"range": [0, 100]},
-            "bar": {"color": MAGENTA}
-        }
-    ))
-    fig.update_layout(
-        template="plotly_dark",
-        paper_bgcolor=BG
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(figs["gauge"], use_container_width=True)
 
 # =====================================================
 # TABLE
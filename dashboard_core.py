@@ -0,0 +1,339 @@
+"""Shared data-loading, filtering and chart-building helpers.
+
+Keeping these in one module means every page that imports them reuses
+the same st.cache_data entries, since Streamlit keys its cache on
+function identity.
+"""
+
+import io
+
+import streamlit as st
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+
+# orjson is several times faster than the stdlib encoder for the figure
+# JSON shipped to the frontend on every rerun
+pio.json.config.default_engine = "orjson"
+
+# Theme colors
+BG = "#080C14"          # background
+ACCENT = "#4e9eff"      # electric blue
+MAGENTA = "#ff4e88"     # pink accent
+PANEL = "#121B2D"       # card color
+
+CLASS_COLS = ("Mass_Class", "Spin_Class", "Eddington_Class")
+
+RADAR_COLS = [
+    "Magnetic_Flux_Gauss", "Gravitational_Redshift",
+    "Radiation_Pressure", "Relativistic_Beaming_Factor",
+    "Hardness_Ratio", "Eddington_Ratio"
+]
+
+# cap on points shipped to the browser for the temperature line
+MAX_LINE_POINTS = 2000
+
+
+def _decimate_minmax(x, y, max_points=MAX_LINE_POINTS):
+    """Bucketed min-max downsample keeping every peak and trough visible.
+
+    Caps the line payload at max_points regardless of dataset size, so
+    frontend render cost stays roughly constant as the workbook grows.
+    """
+    n = len(x)
+    if n <= max_points:
+        return x, y
+    n_buckets = max_points // 2
+    edges = np.linspace(0, n, n_buckets + 1, dtype=np.int64)
+    idx = np.empty(2 * n_buckets, dtype=np.int64)
+    for i, (lo, hi) in enumerate(zip(edges[:-1], edges[1:])):
+        seg = y[lo:hi]
+        if np.isnan(seg).all():
+            a = b = lo
+        else:
+            a, b = lo + np.nanargmin(seg), lo + np.nanargmax(seg)
+        idx[2 * i], idx[2 * i + 1] = min(a, b), max(a, b)
+    return x[idx], y[idx]
+
+
+# =====================================================
+# DATA LOADING + CLASSIFICATION
+# =====================================================
+@st.cache_data(show_spinner=False)
+def load_data(file_bytes: bytes) -> pd.DataFrame:
+    """Parse the uploaded workbook and derive the class columns.
+
+    Keyed on the raw bytes so filter reruns reuse the parsed frame.
+    """
+    df = pd.read_excel(io.BytesIO(file_bytes), engine="calamine")
+    df.columns = df.columns.str.strip()
+
+    # calamine hands integral-valued cells back as Python ints, so the
+    # erg-scale columns overflow int64 and arrive as object columns of
+    # big ints that orjson cannot encode; coerce them back to float, but
+    # only keep a coercion that introduces no new NaNs so genuinely
+    # textual columns (e.g. string IDs) stay intact
+    for col in df.select_dtypes(include="object").columns:
+        coerced = pd.to_numeric(df[col], errors="coerce")
+        if (coerced.isna() == df[col].isna()).all():
+            df[col] = coerced
+
+    # float32 is plenty for plotting/means and halves the bytes every
+    # mask, reduction and sort has to scan; downcast="float" is value-
+    # checked, so columns beyond float32 range (the erg scales) stay
+    # float64 instead of overflowing to inf
+    num_cols = df.select_dtypes(include="float64").columns
+    df[num_cols] = df[num_cols].apply(pd.to_numeric, downcast="float")
+
+    # sort by mass once; mask-sliced frames stay in mass order, so the
+    # temperature line never has to re-sort per rerun
+    df = df.sort_values("BlackHole_Mass_SolarMass").reset_index(drop=True)
+
+    return add_classes(df)
+
+
+def add_classes(df):
+    """Bin mass, spin and Eddington ratio into categorical class columns."""
+    # mass quantiles computed once, then each column is binned in a single pass
+    q1, q2 = df["BlackHole_Mass_SolarMass"].quantile([0.33, 0.66])
+
+    df["Mass_Class"] = pd.cut(
+        df["BlackHole_Mass_SolarMass"],
+        bins=[-np.inf, q1, q2, np.inf],
+        labels=["Low Mass", "Medium Mass", "High Mass"]
+    ).astype(object).fillna("Unknown")
+
+    df["Spin_Class"] = pd.cut(
+        df["Spin_Factor"],
+        bins=[-np.inf, 0.33, 0.66, np.inf],
+        labels=["Low Spin", "Medium Spin", "High Spin"]
+    ).astype(object).fillna("Unknown")
+
+    df["Eddington_Class"] = pd.cut(
+        df["Eddington_Ratio"],
+        bins=[-np.inf, 0.1, 1.0, np.inf],
+        labels=["Sub-Eddington", "Near-Eddington", "Super-Eddington"]
+    ).astype(object).fillna("Unknown")
+
+    # categorical dtype: int8 codes instead of object pointers, so the filter
+    # mask scans ~8x fewer bytes
+    for c in CLASS_COLS:
+        df[c] = df[c].astype("category")
+
+    return df
+
+
+# =====================================================
+# FILTERING + AGGREGATES
+# =====================================================
+# the frame arguments carry a leading underscore so st.cache_data leaves
+# them out of the cache key; filter_key plus the upload token (stable per
+# uploaded file) key every entry instead
+@st.cache_data(show_spinner=False)
+def apply_filters(_df, filter_key, upload_token):
+    mask = np.ones(len(_df), dtype=bool)
+    for col, selected in zip(CLASS_COLS, filter_key):
+        cats = _df[col].cat.categories
+        sel_codes = [cats.get_loc(v) for v in selected if v in cats]
+        mask &= np.isin(_df[col].cat.codes.to_numpy(), sel_codes)
+    return _df[mask]
+
+
+@st.cache_data(show_spinner=False)
+def compute_kpis(_filtered, filter_key, upload_token):
+    return {
+        "count": len(_filtered),
+        "mean_mass": _filtered["BlackHole_Mass_SolarMass"].mean(),
+        "mean_spin": _filtered["Spin_Factor"].mean(),
+        "mean_lum": _filtered["Xray_Luminosity_erg_s"].mean()
+    }
+
+
+@st.cache_data(show_spinner=False)
+def global_stats(_df, upload_token):
+    # depends only on the full frame, never on the filters
+    jet_90 = 0.0
+    if "Jet_Energy_erg" in _df:
+        jet_90 = float(_df["Jet_Energy_erg"].quantile(0.90))
+    return {"jet_90": jet_90}
+
+
+HOT_COLS = (
+    "BlackHole_Mass_SolarMass", "Xray_Luminosity_erg_s",
+    "Disk_Temperature_Inner_K", "Jet_Energy_erg",
+    "Eddington_Ratio", "BlackHole_ID"
+)
+
+
+@st.cache_data(show_spinner=False)
+def extract_arrays(_filtered, filter_key, upload_token):
+    """SoA view of the hot columns for the chart builders.
+
+    Plain ndarrays skip per-access DataFrame __getitem__/alignment
+    overhead and keep orjson on its NumPy fast path when the traces are
+    serialized.
+    """
+    arrs = {c: _filtered[c].to_numpy() for c in HOT_COLS if c in _filtered.columns}
+    arrs["edd_codes"] = _filtered["Eddington_Class"].cat.codes.to_numpy()
+    return arrs
+
+
+@st.cache_data(show_spinner=False)
+def spin_class_counts(_filtered, filter_key, upload_token):
+    # tiny bincount over the int8 codes instead of hashing N strings
+    cats = _filtered["Spin_Class"].cat.categories
+    counts = np.bincount(
+        _filtered["Spin_Class"].cat.codes.to_numpy(), minlength=len(cats)
+    )
+    # drop empty classes so deselected ones don't render as empty bars,
+    # matching the baseline value_counts and the pie builder
+    spin_count = pd.DataFrame({"Spin_Class": cats, "count": counts})
+    return spin_count[spin_count["count"] > 0]
+
+
+# =====================================================
+# CHART BUILDERS
+# =====================================================
+# Builders return the figure serialized to JSON: the string is hashable
+# and picklable, so both construction and serialization are cached on
+# the filter tuple and upload token. Callers rehydrate with pio.from_json.
+@st.cache_data(show_spinner=False)
+def make_fig_pie(_filtered, filter_key, upload_token):
+    # aggregate server-side so the payload is three slices, not N rows
+    mass_count = _filtered["Mass_Class"].value_counts()
+    mass_count = mass_count[mass_count > 0]
+    fig = px.pie(
+        names=mass_count.index,
+        values=mass_count.to_numpy(),
+        hole=0.55,
+        color_discrete_sequence=[ACCENT, MAGENTA, "#82eefd"]
+    )
+    fig.update_layout(
+        template="plotly_dark",
+        title="Mass Class Breakdown",
+        paper_bgcolor=BG
+    )
+    return pio.to_json(fig)
+
+
+@st.cache_data(show_spinner=False)
+def make_fig_spin_bar(_filtered, filter_key, upload_token):
+    spin_count = spin_class_counts(_filtered, filter_key, upload_token)
+    fig = px.bar(
+        spin_count,
+        x="Spin_Class",
+        y="count",
+        color="count",
+        color_continuous_scale="Viridis"
+    )
+    fig.update_layout(
+        template="plotly_dark",
+        title="Spin Class Distribution",
+        paper_bgcolor=BG
+    )
+    return pio.to_json(fig)
+
+
+@st.cache_data(show_spinner=False)
+def make_fig_scatter(_filtered, filter_key, upload_token):
+    # one Scattergl trace per Eddington class, sliced from raw arrays by
+    # the int8 code mask
+    arrs = extract_arrays(_filtered, filter_key, upload_token)
+    cats = _filtered["Eddington_Class"].cat.categories
+    palette = [ACCENT, MAGENTA, "#ffa94e", "#82eefd"]
+
+    fig = go.Figure()
+    for code, (name, colr) in enumerate(zip(cats, palette)):
+        m = arrs["edd_codes"] == code
+        if not m.any():
+            continue
+        fig.add_trace(go.Scattergl(
+            x=arrs["BlackHole_Mass_SolarMass"][m],
+            y=arrs["Xray_Luminosity_erg_s"][m],
+            mode="markers",
+            name=str(name),
+            marker=dict(color=colr, line=dict(width=0)),
+            customdata=arrs["BlackHole_ID"][m],
+            hovertemplate=(
+                "BlackHole_Mass_SolarMass=%{x}<br>"
+                "Xray_Luminosity_erg_s=%{y}<br>"
+                "BlackHole_ID=%{customdata}<extra>%{fullData.name}</extra>"
+            )
+        ))
+    fig.update_layout(
+        template="plotly_dark",
+        title="Mass vs X-ray Luminosity",
+        paper_bgcolor=BG,
+        xaxis_title="BlackHole_Mass_SolarMass",
+        yaxis_title="Xray_Luminosity_erg_s",
+        legend_title_text="Eddington_Class"
+    )
+    return pio.to_json(fig)
+
+
+@st.cache_data(show_spinner=False)
+def make_fig_line(_filtered, filter_key, upload_token):
+    # the frame is already in mass order (sorted at load time)
+    arrs = extract_arrays(_filtered, filter_key, upload_token)
+    x, y = _decimate_minmax(
+        arrs["BlackHole_Mass_SolarMass"], arrs["Disk_Temperature_Inner_K"]
+    )
+    fig = go.Figure(go.Scattergl(x=x, y=y, mode="lines", line_color=ACCENT))
+    fig.update_layout(
+        title="Inner Disk Temperature Trend",
+        template="plotly_dark",
+        paper_bgcolor=BG,
+        xaxis_title="BlackHole_Mass_SolarMass",
+        yaxis_title="Disk_Temperature_Inner_K"
+    )
+    return pio.to_json(fig)
+
+
+@st.cache_data(show_spinner=False)
+def make_fig_radar(_filtered, filter_key, upload_token):
+    # one fused reduction; reindex zero-fills any missing column without
+    # a Python branch per column
+    present = [c for c in RADAR_COLS if c in _filtered.columns]
+    radar_vals = (
+        _filtered[present].agg("mean").reindex(RADAR_COLS, fill_value=0).to_numpy()
+    )
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatterpolar(
+        r=radar_vals,
+        theta=RADAR_COLS,
+        fill='toself',
+        line_color=ACCENT
+    ))
+    fig.update_layout(
+        title="Accretion Physics Radar Model",
+        template="plotly_dark",
+        paper_bgcolor=BG
+    )
+    return pio.to_json(fig)
+
+
+@st.cache_data(show_spinner=False)
+def make_fig_gauge(_filtered, filter_key, upload_token, jet_90):
+    if "Jet_Energy_erg" in _filtered and not _filtered["Jet_Energy_erg"].isna().all():
+        jet_mean = _filtered["Jet_Energy_erg"].mean()
+        score = min(100, (jet_mean / jet_90) * 100) if jet_90 else 0
+    else:
+        score = 0
+
+    fig = go.Figure(go.Indicator(
+        mode="gauge+number",
+        value=score,
+        title={"text": "Jet Power Index"},
+        gauge={
+            "axis": {"range": [0, 100]},
+            "bar": {"color": MAGENTA}
+        }
+    ))
+    fig.update_layout(
+        template="plotly_dark",
+        paper_bgcolor=BG
+    )
+    return pio.to_json(fig)